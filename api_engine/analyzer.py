@@ -1,43 +1,121 @@
-import json
+import asyncio
+import re
 from typing import Dict, List, Tuple
+from urllib.parse import urlparse, urlunparse
 
-from openai import OpenAI
+import orjson
+import tiktoken
+from openai import AsyncOpenAI
 
-from api_engine.models import EndpointAnalysisBatch, FilteredEndpoint
+from api_engine.cache import LLMCache
+from api_engine.models import (
+    EndpointAnalysis,
+    EndpointAnalysisBatch,
+    FilteredEndpoint,
+)
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# Path segments that identify a resource rather than an endpoint
+_UUID_SEGMENT = re.compile(
+    r"/[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}(?=/|$)"
+)
+_HEX_SEGMENT = re.compile(r"/[0-9a-fA-F]{16,}(?=/|$)")
+_NUMERIC_SEGMENT = re.compile(r"/\d+(?=/|$)")
+
+MAX_COMPLETION_TOKENS = 5000
+
+# The scoring rubric lives in the Field descriptions of the
+# EndpointAnalysisBatch schema, which is sent as the response format.
+SYSTEM_PROMPT = (
+    "You are an API analysis assistant. Your task is to identify API endpoints that fetch valuable data, "
+    "such as user data and metadata, analytics and tracking, search and recommendation results, "
+    "or logs, system events, and behavioral data.\n\n"
+    "Analyze the provided endpoints and return the ones likely to contain valuable data, "
+    "explained and scored as described in the response schema. "
+    "If no endpoints are found valuable, include at least one as a potential candidate."
+)
+
+USER_PROMPT_PREFIX = "Here is a batch of API endpoints to analyze:\n\n"
+
+# Part of the LLM cache key, so editing the rubric in models.py invalidates it
+RESPONSE_SCHEMA = EndpointAnalysisBatch.model_json_schema()
+
 
 class EndpointAnalyzer:
     """Analyzes filtered API endpoints using OpenAI's LLM to determine value."""
 
-    def __init__(self, api_key=None, model="gpt-4o-mini", chunk_size=5):
+    def __init__(
+        self,
+        api_key=None,
+        model="gpt-4o-mini",
+        chunk_size=None,
+        max_input_tokens=32000,
+        output_tokens_per_endpoint=100,
+        min_chunk_size=1,
+        max_workers=8,
+        cache_dir=None,
+        cache_enabled=True,
+        cache_ttl=None,
+    ):
         """Initialize the analyzer.
 
         Args:
             api_key: OpenAI API key
             model: OpenAI model to use
-            chunk_size: Number of endpoints to analyze in a single API call
+            chunk_size: Optional cap on the number of endpoints per API call
+            max_input_tokens: Token budget for a single API call, including the
+                system prompt and the expected output
+            output_tokens_per_endpoint: Expected output tokens for each endpoint
+            min_chunk_size: Endpoints always sent together, even if over budget
+            max_workers: Maximum number of API calls in flight at once
+            cache_dir: Optional directory for caching LLM responses
+            cache_enabled: Whether to use the response cache when cache_dir is set
+            cache_ttl: Optional cache entry lifetime in seconds
         """
         self.api_key = api_key
         self.model = model
         self.chunk_size = chunk_size
-        self.client = None
+        self.max_input_tokens = max_input_tokens
+        self.output_tokens_per_endpoint = output_tokens_per_endpoint
+        self.min_chunk_size = min_chunk_size
+        self.max_workers = max_workers
+        self.cache = None
+        # The tokenizer is loaded on first use; it may need a network download
+        self._encoding = None
+        self._encoding_loaded = False
 
-        if self.api_key:
-            self.client = OpenAI(api_key=self.api_key)
-        else:
+        if cache_dir and cache_enabled:
+            self.cache = LLMCache(cache_dir, ttl=cache_ttl)
+
+        if not self.api_key:
             logger.warning(
                 "No API key provided. Will attempt to use environment variable."
             )
-            self.client = OpenAI()
 
     def analyze(
         self, filtered_endpoints: List[FilteredEndpoint], output_file: str = None
     ) -> Tuple[bool, EndpointAnalysisBatch]:
         """Analyze endpoints and optionally save results to output file.
 
+        Runs aanalyze on a new event loop, so it must not be called from
+        inside a running loop.
+
+        Args:
+            filtered_endpoints: List of FilteredEndpoint objects
+            output_file: Optional path to save analysis results
+
+        Returns:
+            tuple: (success, list_of_endpoint_analyses)
+        """
+        return asyncio.run(self.aanalyze(filtered_endpoints, output_file))
+
+    async def aanalyze(
+        self, filtered_endpoints: List[FilteredEndpoint], output_file: str = None
+    ) -> Tuple[bool, EndpointAnalysisBatch]:
+        """Analyze endpoints concurrently and optionally save results to output file.
+
         Args:
             filtered_endpoints: List of FilteredEndpoint objects
             output_file: Optional path to save analysis results
@@ -50,23 +128,60 @@ class EndpointAnalyzer:
                 f"Starting endpoint analysis of {len(filtered_endpoints)} endpoints"
             )
 
+            # Collapse URLs that only differ by IDs into one representative each
+            templates = {}
+            template_urls = {}
+            for endpoint in filtered_endpoints:
+                template = self._canonicalize(endpoint.url)
+                templates.setdefault(template, endpoint)
+                template_urls.setdefault(template, []).append(endpoint.url)
+            logger.info(
+                f"Deduplicated {len(filtered_endpoints)} endpoints into {len(templates)} URL templates"
+            )
+
             # Process data in chunks
             all_results = []
             endpoints_dict = {
-                endpoint.url: endpoint.model_dump() for endpoint in filtered_endpoints
+                endpoint.url: self._prompt_payload(endpoint)
+                for endpoint in templates.values()
             }
 
-            for chunk in self._chunk_data(endpoints_dict, self.chunk_size):
-                result = self._analyze_endpoints(chunk)
+            chunks = list(self._chunk_data(endpoints_dict))
+
+            # Run the API calls concurrently; results are collected in chunk order.
+            # The client is created per run because its connection pool is bound
+            # to the event loop it was first used on.
+            semaphore = asyncio.Semaphore(self.max_workers)
+            async with AsyncOpenAI(api_key=self.api_key or None) as client:
+
+                async def _bounded_analyze(chunk):
+                    async with semaphore:
+                        return await self._aanalyze_endpoints(client, chunk)
+
+                results = await asyncio.gather(
+                    *(_bounded_analyze(chunk) for chunk in chunks),
+                    return_exceptions=True,
+                )
+
+            for result in results:
+                if isinstance(result, Exception):
+                    logger.error(f"Chunk analysis failed: {str(result)}")
+                    continue
                 if hasattr(result, "endpoints"):
-                    all_results.extend(result.endpoints)
+                    all_results.extend(
+                        self._expand_templates(result.endpoints, template_urls)
+                    )
 
             combined_results = EndpointAnalysisBatch(endpoints=all_results)
 
             # Optionally save results
             if output_file:
-                with open(output_file, "w") as outfile:
-                    json.dump(combined_results.model_dump(), outfile, indent=4)
+                with open(output_file, "wb") as outfile:
+                    outfile.write(
+                        orjson.dumps(
+                            combined_results.model_dump(), option=orjson.OPT_INDENT_2
+                        )
+                    )
                 logger.info(f"Analysis results saved to {output_file}")
 
             logger.info(
@@ -78,78 +193,239 @@ class EndpointAnalyzer:
             logger.error(f"Error during endpoint analysis: {str(e)}")
             return False, []
 
-    def _chunk_data(self, data: Dict, chunk_size: int = 20):
-        """Split data into smaller chunks for processing.
+    def _prompt_payload(self, endpoint: FilteredEndpoint) -> Dict:
+        """Build the prompt data for an endpoint with plain attribute access.
+
+        This skips Pydantic serialization, and the URL is left out because it
+        is already the key of the prompt entry.
+
+        Args:
+            endpoint: FilteredEndpoint to describe
+
+        Returns:
+            Dict: JSON-serializable endpoint data
+        """
+        return {
+            "methods": endpoint.methods,
+            "params": endpoint.params,
+            "sample_headers": endpoint.sample_headers,
+            "sample_post_data": endpoint.sample_post_data,
+        }
+
+    def _canonicalize(self, url: str) -> str:
+        """Normalize a URL into a template by replacing resource identifiers.
+
+        Numeric path segments become {id}, UUIDs become {uuid}, long hex
+        strings become {hex}, and query values are dropped while the sorted
+        query keys are kept.
+
+        Args:
+            url: Endpoint URL
+
+        Returns:
+            str: Canonical URL template
+        """
+        parsed = urlparse(url)
+        path = _UUID_SEGMENT.sub("/{uuid}", parsed.path)
+        path = _HEX_SEGMENT.sub("/{hex}", path)
+        path = _NUMERIC_SEGMENT.sub("/{id}", path)
+
+        query_keys = sorted(
+            {pair.split("=", 1)[0] for pair in parsed.query.split("&") if pair}
+        )
+        return urlunparse(
+            (parsed.scheme, parsed.netloc, path, "", "&".join(query_keys), "")
+        )
+
+    def _expand_templates(
+        self, analyses: List[EndpointAnalysis], template_urls: Dict[str, List[str]]
+    ) -> List[EndpointAnalysis]:
+        """Copy each analysis to every original URL sharing its template.
+
+        Args:
+            analyses: Analyses returned by the LLM for representative URLs
+            template_urls: Dict mapping URL templates to their original URLs
+
+        Returns:
+            List[EndpointAnalysis]: Analyses for all original URLs
+        """
+        expanded = []
+        for analysis in analyses:
+            urls = template_urls.get(self._canonicalize(analysis.url), [analysis.url])
+            for url in urls:
+                expanded.append(analysis.model_copy(update={"url": url}))
+        return expanded
+
+    def _get_encoding(self):
+        """Return the tiktoken encoding for the model, or None if it can't load."""
+        if not self._encoding_loaded:
+            self._encoding_loaded = True
+            try:
+                try:
+                    self._encoding = tiktoken.encoding_for_model(self.model)
+                except KeyError:
+                    self._encoding = tiktoken.get_encoding("o200k_base")
+            except Exception as e:
+                logger.warning(
+                    f"Could not load tokenizer, estimating token counts: {str(e)}"
+                )
+        return self._encoding
+
+    def _count_tokens(self, obj) -> int:
+        """Count the tokens needed to send an object in the prompt.
+
+        Args:
+            obj: String, or JSON-serializable object formatted as in the prompt
+
+        Returns:
+            int: Number of tokens
+        """
+        text = obj if isinstance(obj, str) else orjson.dumps(obj).decode("utf-8")
+        encoding = self._get_encoding()
+        if encoding is None:
+            # Roughly four characters per token for English and JSON
+            return len(text) // 4 + 1
+        return len(encoding.encode(text))
+
+    def _fixed_prompt_tokens(self) -> int:
+        """Count the tokens every request carries regardless of its endpoints.
+
+        This covers the system prompt, the response schema, the user message
+        prefix and the {"endpoints": ...} wrapper.
+        """
+        return (
+            self._count_tokens(SYSTEM_PROMPT)
+            + self._count_tokens(RESPONSE_SCHEMA)
+            + self._count_tokens(USER_PROMPT_PREFIX)
+            + self._count_tokens({"endpoints": {}})
+        )
+
+    def _chunk_data(self, data: Dict):
+        """Pack endpoints into chunks that fit the per-request token budget.
 
         Args:
             data: Dictionary of endpoint data
-            chunk_size: Maximum number of endpoints per chunk
 
         Yields:
             Dict: Chunk of data
         """
-        items = list(data.items())
-        logger.info(f"Chunking {len(items)} endpoints into batches of {chunk_size}")
-        for i in range(0, len(items), chunk_size):
-            yield dict(items[i : i + chunk_size])
+        max_per_chunk = max(
+            self.min_chunk_size,
+            MAX_COMPLETION_TOKENS // self.output_tokens_per_endpoint,
+        )
+        if self.chunk_size:
+            max_per_chunk = min(max_per_chunk, self.chunk_size)
+
+        logger.info(
+            f"Packing {len(data)} endpoints into chunks of up to "
+            f"{self.max_input_tokens} tokens"
+        )
+
+        fixed_tokens = self._fixed_prompt_tokens()
+
+        chunk = {}
+        chunk_tokens = fixed_tokens
+        for url, endpoint_data in data.items():
+            endpoint_tokens = self._count_tokens({url: endpoint_data})
+            projected_tokens = (
+                chunk_tokens
+                + endpoint_tokens
+                + self.output_tokens_per_endpoint * (len(chunk) + 1)
+            )
+            if len(chunk) >= self.min_chunk_size and (
+                len(chunk) >= max_per_chunk or projected_tokens > self.max_input_tokens
+            ):
+                yield chunk
+                chunk = {}
+                chunk_tokens = fixed_tokens
+
+            chunk[url] = endpoint_data
+            chunk_tokens += endpoint_tokens
+
+        if chunk:
+            yield chunk
+
+    async def _cache_get(self, key: str):
+        """Return the cached batch for key, treating any cache error as a miss.
+
+        The shelve access blocks, so it runs in a worker thread.
+        """
+        try:
+            cached = await asyncio.to_thread(self.cache.get, key)
+            if cached is not None:
+                return EndpointAnalysisBatch.model_validate_json(cached)
+        except Exception as e:
+            logger.warning(f"Error reading LLM cache: {str(e)}")
+        return None
 
-    def _analyze_endpoints(self, preprocessed_data: Dict) -> EndpointAnalysisBatch:
+    async def _cache_set(self, key: str, result: EndpointAnalysisBatch) -> None:
+        """Store a batch in the cache, logging instead of raising on failure."""
+        try:
+            await asyncio.to_thread(self.cache.set, key, result.model_dump_json())
+        except Exception as e:
+            logger.warning(f"Error writing LLM cache: {str(e)}")
+
+    async def _aanalyze_endpoints(
+        self, client: AsyncOpenAI, preprocessed_data: Dict
+    ) -> EndpointAnalysisBatch:
         """Process endpoints with the LLM.
 
         Args:
+            client: OpenAI client for the current event loop
             preprocessed_data: Dictionary mapping URLs to request data
 
         Returns:
             List[EndpointAnalysis]: List of analyzed endpoints
         """
         try:
-            formatted_endpoints_json = json.dumps(
-                {"endpoints": preprocessed_data}, indent=2
-            )
+            cache_key = None
+            if self.cache:
+                cache_key = LLMCache.make_key(
+                    {
+                        "m": self.model,
+                        "s": SYSTEM_PROMPT,
+                        "r": RESPONSE_SCHEMA,
+                        "c": preprocessed_data,
+                    }
+                )
+                cached = await self._cache_get(cache_key)
+                if cached is not None:
+                    logger.info("Using cached analysis for chunk.")
+                    return cached
+
+            # Compact JSON: pretty-printing roughly doubles the prompt's tokens
+            formatted_endpoints_json = orjson.dumps(
+                {"endpoints": preprocessed_data}
+            ).decode("utf-8")
 
             # Create messages for LLM
             messages = [
                 {
                     "role": "system",
-                    "content": (
-                        "You are an API analysis assistant. Your task is to identify API endpoints that fetch valuable data. "
-                        "These could include:\n"
-                        "- User data and metadata\n"
-                        "- Analytics and tracking\n"
-                        "- Search and recommendation results\n"
-                        "- Logs, system events, or behavioral data\n\n"
-                        "Please analyze the provided endpoints and determine which ones are likely to contain valuable data. "
-                        "For each endpoint you identify:\n"
-                        "1. Provide a clear explanation of why it's valuable\n"
-                        "2. Assign a usefulness score from 0-100 where:\n"
-                        "   - 0-20: Minimal value, mostly static or basic data\n"
-                        "   - 21-40: Some value but limited utility\n"
-                        "   - 41-60: Moderately useful data\n"
-                        "   - 61-80: High-value data with clear utility\n"
-                        "   - 81-100: Critical data with significant strategic value\n\n"
-                        "If no endpoints are found valuable, include at least one as a potential candidate with a reason why it might be useful "
-                        "and a corresponding score.\n\n"
-                        "Format the response strictly as a JSON object with an 'endpoints' array containing URL(s), explanations, and usefulness scores."
-                    ),
+                    "content": SYSTEM_PROMPT,
                 },
                 {
                     "role": "user",
-                    "content": f"Here is a batch of API endpoints to analyze:\n\n{formatted_endpoints_json}",
+                    "content": USER_PROMPT_PREFIX + formatted_endpoints_json,
                 },
             ]
 
             logger.info(f"Making API request with model {self.model}...")
-            response = self.client.beta.chat.completions.parse(
+            response = await client.beta.chat.completions.parse(
                 model=self.model,
                 messages=messages,
-                max_completion_tokens=5000,
-                temperature=0.1,
+                max_completion_tokens=MAX_COMPLETION_TOKENS,
+                temperature=0.0,
                 response_format=EndpointAnalysisBatch,
             )
 
             logger.info("API request successful.")
 
-            return response.choices[0].message.parsed
+            result = response.choices[0].message.parsed
+            if self.cache and result is not None:
+                await self._cache_set(cache_key, result)
+
+            return result
 
         except Exception as e:
             logger.error(f"Error during API processing: {str(e)}")
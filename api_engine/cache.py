@@ -0,0 +1,74 @@
+import hashlib
+import os
+import shelve
+import threading
+import time
+from typing import Optional
+
+import orjson
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# shelve does not support concurrent writers, so every LLMCache instance in the
+# process that points at the same database shares one lock
+_locks = {}
+_locks_guard = threading.Lock()
+
+
+def _lock_for(path: str) -> threading.Lock:
+    """Return the process-wide lock for a cache database path."""
+    with _locks_guard:
+        return _locks.setdefault(os.path.abspath(path), threading.Lock())
+
+
+class LLMCache:
+    """Content-addressed on-disk cache for LLM responses."""
+
+    def __init__(self, cache_dir: str, ttl: Optional[float] = None):
+        """Initialize the cache.
+
+        Args:
+            cache_dir: Directory to store the cache database in
+            ttl: Optional time-to-live for entries in seconds (None never expires)
+        """
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self._path = os.path.join(cache_dir, "responses")
+        self._lock = _lock_for(self._path)
+
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(payload) -> str:
+        """Compute a stable SHA-256 key for a JSON-serializable payload."""
+        encoded = orjson.dumps(payload, option=orjson.OPT_SORT_KEYS)
+        return hashlib.sha256(encoded).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached value for key, or None if missing or expired."""
+        with self._lock, shelve.open(self._path) as db:
+            entry = db.get(key)
+            if entry is None:
+                return None
+
+            stored_at, value = entry
+            if self.ttl is not None and time.time() - stored_at > self.ttl:
+                del db[key]
+                return None
+
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        """Store value under key and drop any expired entries."""
+        with self._lock, shelve.open(self._path) as db:
+            now = time.time()
+            if self.ttl is not None:
+                expired = [
+                    k for k, (stored_at, _) in db.items() if now - stored_at > self.ttl
+                ]
+                for k in expired:
+                    del db[k]
+
+            db[key] = (now, value)
@@ -1,15 +1,40 @@
-import json
+import os
+import re
+import tempfile
 from urllib.parse import urlparse
 
+import ijson
 from playwright.sync_api import sync_playwright
 
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# Matches one "name=value" pair of a Cookie header string
+_COOKIE_RE = re.compile(r"\s*([^=;\s]+)\s*=([^;]*)")
+
+
+def iter_har_entries(har_path):
+    """Stream entries from a HAR file one at a time.
+
+    Args:
+        har_path: Path to the HAR file
+
+    Yields:
+        dict: HAR entry
+    """
+    with open(har_path, "rb") as f:
+        yield from ijson.items(f, "log.entries.item", use_float=True)
+
 
 class HarCapture:
-    """Captures network traffic in HAR format using Playwright."""
+    """Captures network traffic in HAR format using Playwright.
+
+    The browser is launched once and reused for every capture made while the
+    capture is open (see ``open``/``close`` or the context-manager form). Each
+    capture gets its own browser context, so cookies and HAR recordings never
+    leak between URLs.
+    """
 
     def __init__(self, timeout=5000):
         """Initialize the HAR capture with configurable timeout.
@@ -18,6 +43,38 @@ class HarCapture:
             timeout: Time to wait after page load in milliseconds
         """
         self.timeout = timeout
+        self._playwright = None
+        self._browser = None
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def open(self):
+        """Start Playwright and launch the shared browser if not already running."""
+        if self._browser is None:
+            logger.info("Launching browser")
+            self._playwright = sync_playwright().start()
+            try:
+                self._browser = self._playwright.chromium.launch(headless=True)
+            except Exception:
+                # Don't leak the driver process if the browser can't start
+                self._playwright.stop()
+                self._playwright = None
+                raise
+
+    def close(self):
+        """Close the shared browser and stop Playwright."""
+        if self._browser is not None:
+            logger.info("Closing browser")
+            self._browser.close()
+            self._browser = None
+        if self._playwright is not None:
+            self._playwright.stop()
+            self._playwright = None
 
     def _parse_cookies(self, cookie_string, url):
         """Parse cookie string into Playwright cookie format.
@@ -32,83 +89,108 @@ class HarCapture:
         if not cookie_string:
             return []
 
-        cookies = []
-        parsed_url = urlparse(url)
-        domain = parsed_url.netloc
-
-        for cookie_pair in cookie_string.split(";"):
-            cookie_pair = cookie_pair.strip()
-            if "=" in cookie_pair:
-                name, value = cookie_pair.split("=", 1)
-                cookies.append(
-                    {
-                        "name": name.strip(),
-                        "value": value.strip(),
-                        "domain": domain,
-                        "path": "/",
-                    }
-                )
-
-        return cookies
+        domain = urlparse(url).netloc
+
+        return [
+            {"name": name, "value": value.strip(), "domain": domain, "path": "/"}
+            for name, value in _COOKIE_RE.findall(cookie_string)
+        ]
+
+    def _prepare(self, url, cookies):
+        """Normalize the URL and cookies for a capture.
+
+        Args:
+            url: The URL to navigate to
+            cookies: Optional cookie string or list of cookie dicts
+
+        Returns:
+            tuple: (url, list_of_cookie_dicts)
+        """
+        # Add protocol if missing
+        if not url.startswith("http://") and not url.startswith("https://"):
+            url = "https://" + url
+
+        if isinstance(cookies, str):
+            parsed_cookies = self._parse_cookies(cookies, url)
+        else:
+            parsed_cookies = cookies or []
+
+        return url, parsed_cookies
+
+    def _har_path(self, output_file):
+        """Return the path Playwright should record the HAR to.
+
+        The HAR is recorded straight to the output file when one is given.
+        Otherwise a temporary file is used, which the caller owns on success.
+
+        Returns:
+            tuple: (har_path, is_temporary)
+        """
+        if output_file:
+            return output_file, False
+
+        fd, temp_har_path = tempfile.mkstemp(suffix=".har")
+        os.close(fd)
+        return temp_har_path, True
+
+    def _new_context_options(self, har_path):
+        """Build browser context options for HAR recording.
+
+        Response bodies are never read downstream, so they are omitted from the
+        recording to keep the HAR small.
+        """
+        return {"record_har_path": har_path, "record_har_content": "omit"}
 
     def capture(self, url, output_file=None, cookies=None):
         """Capture HAR data from the given URL.
 
+        If the capture has not been opened, a browser is launched for this call
+        only and closed afterwards.
+
         Args:
             url: The URL to navigate to
             output_file: Optional path to save the HAR file
             cookies: Optional cookie string or list of cookie dicts
 
         Returns:
-            tuple: (success, har_data_dict)
+            tuple: (success, har_path). Without output_file the HAR is left in a
+            temporary file that the caller is responsible for removing.
         """
-        try:
-            # Add protocol if missing
-            if not url.startswith("http://") and not url.startswith("https://"):
-                url = "https://" + url
+        owns_browser = self._browser is None
+        har_path, is_temporary = self._har_path(output_file)
 
+        try:
+            url, parsed_cookies = self._prepare(url, cookies)
             logger.info(f"Capturing HAR data for {url}")
-            temp_har_path = "temp_capture.har"
-
-            with sync_playwright() as p:
-                browser = p.chromium.launch(headless=True)
-                context = browser.new_context(record_har_path=temp_har_path)
 
-                # Add cookies if provided
-                if cookies:
-                    if isinstance(cookies, str):
-                        parsed_cookies = self._parse_cookies(cookies, url)
-                    else:
-                        parsed_cookies = cookies
+            if owns_browser:
+                self.open()
 
-                    if parsed_cookies:
-                        context.add_cookies(parsed_cookies)
-                        logger.info(f"Added {len(parsed_cookies)} cookies to browser context")
+            context = self._browser.new_context(**self._new_context_options(har_path))
+            try:
+                if parsed_cookies:
+                    context.add_cookies(parsed_cookies)
+                    logger.info(f"Added {len(parsed_cookies)} cookies to browser context")
 
                 page = context.new_page()
 
                 logger.info(f"Navigating to {url}...")
                 page.goto(url)
                 page.wait_for_timeout(self.timeout)
-
-                logger.info("Closing browser and collecting HAR data...")
+            finally:
+                logger.info("Closing context and collecting HAR data...")
                 context.close()
-                browser.close()
-
-                # Load the HAR data from the temporary file
-                with open(temp_har_path, "r") as f:
-                    har_data = json.load(f)
 
-                # Optionally save to the specified output file
-                if output_file:
-                    with open(output_file, "w") as f:
-                        json.dump(har_data, f)
-                    logger.info(f"HAR file saved to {output_file}")
+            logger.info(f"HAR capture completed successfully, saved to {har_path}")
 
-                logger.info("HAR capture completed successfully")
-
-            return True, har_data
+            return True, har_path
 
         except Exception as e:
             logger.error(f"Failed to capture HAR: {str(e)}")
+            if is_temporary and os.path.exists(har_path):
+                os.remove(har_path)
             return False, None
+
+        finally:
+            if owns_browser:
+                self.close()
@@ -1,6 +1,7 @@
-import json
 from collections import defaultdict
-from typing import Dict, List, Tuple
+from typing import Dict, Iterable, List, Tuple
+
+import orjson
 
 from api_engine.models import ApiRequest, FilteredEndpoint
 from utils.logger import get_logger
@@ -12,13 +13,13 @@ class HarFilter:
     """Filters and processes HAR files to extract API requests."""
 
     def filter(
-        self, har_data, request_type: str, output_path: str = None
+        self, har_entries: Iterable[Dict], request_type: str, output_path: str = None
     ) -> Tuple[bool, List[FilteredEndpoint]]:
         """
         Filter HAR data for specific request types and preprocess the data.
 
         Args:
-            har_data: HAR data as a dictionary
+            har_entries: Iterable of HAR entries (see capture.iter_har_entries)
             request_type: HTTP method to filter (GET, POST, etc.)
             output_path: Optional output file path for filtered requests
 
@@ -29,18 +30,19 @@ class HarFilter:
             logger.info(f"Filtering HAR data for {request_type} requests")
 
             # Process the HAR data
-            grouped_requests = self._process_har_data(har_data, request_type)
+            grouped_requests = self._process_har_data(har_entries, request_type)
 
             # Convert to filtered endpoints for LLM analysis
             filtered_endpoints = self._convert_to_filtered_endpoints(grouped_requests)
 
             # Optionally save to output file
             if output_path:
-                with open(output_path, "w") as outfile:
-                    json.dump(
-                        [endpoint.model_dump() for endpoint in filtered_endpoints],
-                        outfile,
-                        indent=4,
+                with open(output_path, "wb") as outfile:
+                    outfile.write(
+                        orjson.dumps(
+                            [endpoint.model_dump() for endpoint in filtered_endpoints],
+                            option=orjson.OPT_INDENT_2,
+                        )
                     )
                 logger.info(
                     f"Saved {len(filtered_endpoints)} filtered endpoints to {output_path}"
@@ -53,22 +55,21 @@ class HarFilter:
             return False, []
 
     def _process_har_data(
-        self, har_data, request_type: str
+        self, har_entries: Iterable[Dict], request_type: str
     ) -> Dict[str, List[ApiRequest]]:
         """
-        Process HAR data to extract and group API requests.
+        Process HAR entries to extract and group API requests.
 
         Args:
-            har_data: HAR data as a dictionary
+            har_entries: Iterable of HAR entries
             request_type: HTTP method to filter
 
         Returns:
             Dict mapping endpoints to lists of ApiRequest objects
         """
-        entries = har_data["log"]["entries"]
         grouped_requests = defaultdict(list)
 
-        for entry in entries:
+        for entry in har_entries:
             request = entry["request"]
             if request["method"] == request_type:
                 endpoint = request["url"].split("?")[0]
@@ -1,9 +1,9 @@
 import base64
-import json
 import time
 from typing import Dict, List, Tuple
 from urllib.parse import parse_qs, urlparse
 
+import orjson
 from playwright.sync_api import sync_playwright
 
 from api_engine.models import (
@@ -71,14 +71,14 @@ class HeaderOptimizer:
             return False, None
 
     def _load_matched_requests(self, file_path: str) -> List[Dict]:
-        with open(file_path, "r", encoding="utf-8") as f:
-            return json.load(f)
+        with open(file_path, "rb") as f:
+            return orjson.loads(f.read())
 
     def _load_endpoint_descriptions(self, file_path: str) -> Dict[str, Dict]:
         endpoint_data = {}
 
-        with open(file_path, "r", encoding="utf-8") as f:
-            endpoints_data = json.load(f)
+        with open(file_path, "rb") as f:
+            endpoints_data = orjson.loads(f.read())
             for endpoint in endpoints_data:
                 endpoint_data[endpoint["url"]] = {
                     "explanation": endpoint["explanation"],
@@ -234,8 +234,7 @@ class HeaderOptimizer:
         for k, v in query_params.items():
             try:
                 if k == "d":
-                    decoded = base64.b64decode(v[0]).decode("utf-8")
-                    decoded_params[k] = json.loads(decoded)
+                    decoded_params[k] = orjson.loads(base64.b64decode(v[0]))
                 else:
                     decoded_params[k] = v[0]
             except Exception:
@@ -280,5 +279,5 @@ class HeaderOptimizer:
     def _save_output_data(
         self, output_data: ApiDetectionResults, output_file: str
     ) -> None:
-        with open(output_file, "w", encoding="utf-8") as f:
-            json.dump(output_data.dict(), f, indent=4)
+        with open(output_file, "wb") as f:
+            f.write(orjson.dumps(output_data.dict(), option=orjson.OPT_INDENT_2))
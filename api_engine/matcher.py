@@ -1,5 +1,6 @@
-import json
-from typing import Dict, List, Tuple
+from typing import Dict, Iterable, List, Tuple
+
+import orjson
 
 from api_engine.models import EndpointAnalysis, EndpointAnalysisBatch, MatchedRequest
 from utils.logger import get_logger
@@ -13,23 +14,27 @@ class HarMatcher:
 
     def match(
         self,
-        har_data: Dict,
+        har_entries: Iterable[Dict],
         analyzed_endpoints: EndpointAnalysisBatch,
         output_file: str = None,
+        har_requests: List[dict] = None,
     ) -> Tuple[bool, List[MatchedRequest]]:
         """Match HAR requests with valuable endpoints.
 
         Args:
-            har_data: HAR data as dictionary
+            har_entries: Iterable of HAR entries (see capture.iter_har_entries),
+                ignored when har_requests is given
             analyzed_endpoints: List of analyzed endpoints
             output_file: Optional output path for matched requests
+            har_requests: Optional requests already built with extract_request
 
         Returns:
             tuple: (success, matched_requests)
         """
         try:
             # Load HAR requests
-            har_requests = self._extract_har_requests(har_data)
+            if har_requests is None:
+                har_requests = self._extract_har_requests(har_entries)
             logger.info(f"Extracted {len(har_requests)} requests from HAR data")
 
             # Extract valuable endpoints
@@ -44,11 +49,12 @@ class HarMatcher:
 
             # Optionally save matched requests
             if output_file:
-                with open(output_file, "w", encoding="utf-8") as f:
-                    json.dump(
-                        [request.model_dump() for request in matched_requests],
-                        f,
-                        indent=4,
+                with open(output_file, "wb") as f:
+                    f.write(
+                        orjson.dumps(
+                            [request.model_dump() for request in matched_requests],
+                            option=orjson.OPT_INDENT_2,
+                        )
                     )
                 logger.info(f"Matched requests saved to {output_file}")
 
@@ -57,28 +63,26 @@ class HarMatcher:
             logger.error(f"Error matching HAR requests: {str(e)}")
             return False, []
 
-    def _extract_har_requests(self, har_data: Dict) -> List[dict]:
-        """Extract requests from HAR data."""
-        requests = []
-        for entry in har_data["log"]["entries"]:
-            request = entry["request"]
-            response = entry["response"]
+    def extract_request(self, entry: Dict) -> dict:
+        """Extract the fields needed for matching from a single HAR entry."""
+        request = entry["request"]
+        response = entry["response"]
 
-            requests.append(
-                {
-                    "url": request["url"].split("?")[0],
-                    "method": request["method"],
-                    "headers": {h["name"]: h["value"] for h in request["headers"]},
-                    "status_code": response["status"],
-                }
-            )
+        return {
+            "url": request["url"].split("?")[0],
+            "method": request["method"],
+            "headers": {h["name"]: h["value"] for h in request["headers"]},
+            "status_code": response["status"],
+        }
 
-        return requests
+    def _extract_har_requests(self, har_entries: Iterable[Dict]) -> List[dict]:
+        """Extract requests from HAR entries."""
+        return [self.extract_request(entry) for entry in har_entries]
 
     def _extract_valuable_endpoints(self, file_path: str) -> List[str]:
         """Extract valuable endpoints from analysis results."""
-        with open(file_path, "r", encoding="utf-8") as f:
-            endpoints_data = json.load(f)
+        with open(file_path, "rb") as f:
+            endpoints_data = orjson.loads(f.read())
 
         # Convert to EndpointAnalysis objects if needed for validation
         endpoints = [EndpointAnalysis(**endpoint) for endpoint in endpoints_data]
@@ -26,15 +26,26 @@ class FilteredEndpoint(BaseModel):
 class EndpointAnalysis(BaseModel):
     """Model representing an analyzed endpoint."""
 
-    url: str
-    explanation: str
-    usefulness_score: int
+    url: str = Field(description="Endpoint URL exactly as provided")
+    explanation: str = Field(description="Clear explanation of why it's valuable")
+    usefulness_score: int = Field(
+        description=(
+            "Usefulness score from 0-100 where "
+            "0-20: minimal value, mostly static or basic data; "
+            "21-40: some value but limited utility; "
+            "41-60: moderately useful data; "
+            "61-80: high-value data with clear utility; "
+            "81-100: critical data with significant strategic value"
+        )
+    )
 
 
 class EndpointAnalysisBatch(BaseModel):
     """Model representing a batch of analyzed endpoints."""
 
-    endpoints: List[EndpointAnalysis]
+    endpoints: List[EndpointAnalysis] = Field(
+        description="Endpoints likely to contain valuable data"
+    )
 
 
 class MatchedRequest(BaseModel):
@@ -1,9 +1,13 @@
 import os
 import time
+from concurrent.futures import ThreadPoolExecutor, wait
 from typing import Dict, Optional, Tuple
 
+import orjson
+from pydantic import BaseModel
+
 from api_engine.analyzer import EndpointAnalyzer
-from api_engine.capture import HarCapture
+from api_engine.capture import HarCapture, iter_har_entries
 from api_engine.filter import HarFilter
 from api_engine.headers import HeaderOptimizer
 from api_engine.matcher import HarMatcher
@@ -13,12 +17,35 @@ from utils.logger import get_logger
 # Set up logger
 logger = get_logger(__name__)
 
+# Output files are written in the background so disk I/O stays off the
+# critical path between steps. One pool is shared by every pipeline.
+_io_pool = ThreadPoolExecutor(max_workers=2)
+
+
+def _dump_json(path, data):
+    """Serialize models (or lists of models) and write them to a JSON file."""
+    if isinstance(data, BaseModel):
+        data = data.model_dump()
+    elif isinstance(data, list):
+        data = [
+            item.model_dump() if isinstance(item, BaseModel) else item
+            for item in data
+        ]
+
+    with open(path, "wb") as f:
+        f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+    logger.info(f"Saved output to {path}")
+
 
 class ApiDetectionPipeline:
     """Orchestrates the entire API detection pipeline."""
 
     def __init__(
-        self, output_dir=None, openai_api_key=None, openai_model="gpt-4o-mini"
+        self,
+        output_dir=None,
+        openai_api_key=None,
+        openai_model="gpt-4o-mini",
+        cache_dir=None,
     ):
         """Initialize the pipeline.
 
@@ -26,6 +53,7 @@ class ApiDetectionPipeline:
             output_dir: Optional directory to store output files
             openai_api_key: OpenAI API key for endpoint analysis
             openai_model: OpenAI model to use for analysis
+            cache_dir: Optional LLM cache directory, defaults to output_dir/.llm_cache
         """
         self.output_dir = output_dir
         self.openai_api_key = openai_api_key
@@ -35,15 +63,23 @@ class ApiDetectionPipeline:
         if output_dir:
             os.makedirs(output_dir, exist_ok=True)
 
+        if cache_dir is None and output_dir:
+            cache_dir = os.path.join(output_dir, ".llm_cache")
+
         # Initialize component instances
         self.har_capture = HarCapture()
         self.har_filter = HarFilter()
         self.endpoint_analyzer = EndpointAnalyzer(
-            api_key=openai_api_key, model=openai_model
+            api_key=openai_api_key,
+            model=openai_model,
+            cache_dir=cache_dir,
         )
         self.har_matcher = HarMatcher()
         self.header_optimizer = HeaderOptimizer()
 
+        # Writes queued on _io_pool by this pipeline that run() still waits on
+        self._pending_writes = []
+
         # Define file paths for output if directory is specified
         if output_dir:
             self.har_file = os.path.join(output_dir, "network_traffic.har")
@@ -56,6 +92,33 @@ class ApiDetectionPipeline:
                 self.matched_file
             ) = self.headers_file = None
 
+    def _stream_entries(self, har_path, har_requests):
+        """Stream HAR entries once, collecting the matcher's view of each one.
+
+        Args:
+            har_path: Path to the HAR file
+            har_requests: List that receives one matcher request per entry
+
+        Yields:
+            dict: HAR entry
+        """
+        for entry in iter_har_entries(har_path):
+            har_requests.append(self.har_matcher.extract_request(entry))
+            yield entry
+
+    def _save_async(self, path, data):
+        """Queue a JSON output file to be written in the background."""
+        if path:
+            self._pending_writes.append(_io_pool.submit(_dump_json, path, data))
+
+    def _wait_for_writes(self):
+        """Block until all queued output files are written."""
+        done, _ = wait(self._pending_writes)
+        self._pending_writes = []
+        for future in done:
+            if future.exception():
+                logger.error(f"Failed to save output file: {future.exception()}")
+
     def run(
         self, url, request_type="GET", cookies=None
     ) -> Tuple[bool, Optional[ApiDetectionResults], Dict]:
@@ -76,61 +139,78 @@ class ApiDetectionPipeline:
 
         # Store intermediate results
         intermediate_data = {}
+        har_path = None
 
         try:
             # Step 1: Capture HAR
             logger.info("Step 1: Capturing HAR traffic")
-            capture_success, har_data = self.har_capture.capture(
+            capture_success, har_path = self.har_capture.capture(
                 url, self.har_file, cookies=cookies
             )
             if not capture_success:
                 logger.error("HAR capture failed")
                 return False, None, intermediate_data
 
-            intermediate_data["har_data"] = har_data
+            intermediate_data["har_path"] = har_path
 
-            # Step 2: Filter HAR requests
+            # Step 2: Filter HAR requests. The same pass over the HAR collects
+            # the requests needed for matching in step 4.
             logger.info("Step 2: Filtering HAR requests")
+            har_requests = []
             filter_success, filtered_endpoints = self.har_filter.filter(
-                har_data, request_type, self.filtered_file
+                self._stream_entries(har_path, har_requests), request_type
             )
             if not filter_success:
                 logger.error("HAR filtering failed")
                 return False, None, intermediate_data
 
             intermediate_data["filtered_endpoints"] = filtered_endpoints
+            self._save_async(self.filtered_file, filtered_endpoints)
+
+            # Only requests under a filtered endpoint can ever be matched, so
+            # drop the rest (images, fonts, other methods) before the LLM step
+            endpoint_urls = tuple(endpoint.url for endpoint in filtered_endpoints)
+            har_requests = [
+                har_request
+                for har_request in har_requests
+                if har_request["url"].startswith(endpoint_urls)
+            ]
 
             # Step 3: Analyze endpoints with LLM
             logger.info("Step 3: Analyzing endpoints with LLM")
             analysis_success, analyzed_endpoints = self.endpoint_analyzer.analyze(
-                filtered_endpoints, self.analyzed_file
+                filtered_endpoints
             )
             if not analysis_success:
                 logger.error("Endpoint analysis failed")
                 return False, None, intermediate_data
 
             intermediate_data["analyzed_endpoints"] = analyzed_endpoints
+            self._save_async(self.analyzed_file, analyzed_endpoints)
 
             # Step 4: Match HAR requests with valuable endpoints
             logger.info("Step 4: Matching HAR requests with valuable endpoints")
             match_success, matched_requests = self.har_matcher.match(
-                har_data, analyzed_endpoints, self.matched_file
+                None, analyzed_endpoints, har_requests=har_requests
             )
             if not match_success:
                 logger.error("Request matching failed")
                 return False, None, intermediate_data
 
             intermediate_data["matched_requests"] = matched_requests
+            self._save_async(self.matched_file, matched_requests)
 
             # Step 5: Find necessary headers
             logger.info("Step 5: Finding necessary headers")
             optimize_success, api_results = self.header_optimizer.optimize(
-                matched_requests, analyzed_endpoints, self.headers_file
+                matched_requests, analyzed_endpoints
             )
             if not optimize_success:
                 logger.error("Header optimization failed")
                 return False, None, intermediate_data
 
+            self._save_async(self.headers_file, api_results)
+
             elapsed_time = time.time() - start_time
             logger.info(
                 f"Pipeline completed successfully in {elapsed_time:.2f} seconds"
@@ -140,3 +220,14 @@ class ApiDetectionPipeline:
         except Exception as e:
             logger.exception(f"Pipeline execution failed: {str(e)}")
             return False, None, intermediate_data
+
+        finally:
+            # Make sure every output file is on disk before returning
+            self._wait_for_writes()
+
+            # The HAR only lives in a temp file when there is no output directory;
+            # don't hand callers a path that no longer exists
+            if har_path and not self.har_file:
+                if os.path.exists(har_path):
+                    os.remove(har_path)
+                intermediate_data["har_path"] = None
@@ -1,6 +1,14 @@
 import os
+import shutil
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from operator import attrgetter
 
-from flask import Flask, flash, render_template, request
+from flask import Flask, flash, redirect, render_template, request, url_for
+
+# Number of finished jobs kept around so their result pages can be reloaded
+MAX_FINISHED_JOBS = 100
 
 
 def create_app():
@@ -16,12 +24,72 @@ def create_app():
     app.config["OUTPUT_DIR"] = os.environ.get("OUTPUT_DIR", "output")
     app.config["OPENAI_API_KEY"] = os.environ.get("OPENAI_API_KEY", "")
     app.config["OPENAI_MODEL"] = os.environ.get("OPENAI_MODEL", "gpt-5.1")
+    app.config["PIPELINE_WORKERS"] = int(os.environ.get("PIPELINE_WORKERS", 4))
+    app.config["DELETE_EXPIRED_JOB_OUTPUT"] = (
+        os.environ.get("DELETE_EXPIRED_JOB_OUTPUT", "false").lower() == "true"
+    )
+
+    # Pipeline runs happen off the request thread; jobs maps job ids to the
+    # submitted future and the form values used to start it. Job state lives
+    # in this process, so the app must be served by a single worker process
+    # (see Procfile).
+    executor = ThreadPoolExecutor(max_workers=app.config["PIPELINE_WORKERS"])
+    jobs = {}
+    jobs_lock = threading.Lock()
+
+    def job_output_dir(job_id):
+        """Return the output directory for a job's files."""
+        return os.path.join(app.config["OUTPUT_DIR"], job_id)
+
+    def run_pipeline(job_id, url, request_type, cookies):
+        """Run the API detection pipeline and return endpoints sorted by score."""
+        # Import here to avoid circular imports
+        from api_engine.pipeline import ApiDetectionPipeline
+
+        # Create and run the API detection pipeline. Jobs run concurrently, so
+        # each writes to its own directory; the LLM cache is shared.
+        pipeline = ApiDetectionPipeline(
+            output_dir=job_output_dir(job_id),
+            openai_api_key=app.config["OPENAI_API_KEY"],
+            openai_model=app.config["OPENAI_MODEL"],
+            cache_dir=os.path.join(app.config["OUTPUT_DIR"], ".llm_cache"),
+        )
+
+        success, api_results, _ = pipeline.run(
+            url=url, request_type=request_type, cookies=cookies
+        )
+
+        if not (success and api_results):
+            return None
+
+        # Sort by usefulness score (highest first)
+        return sorted(
+            api_results.endpoints,
+            key=attrgetter("usefulness_score"),
+            reverse=True
+        )
+
+    def forget_old_jobs():
+        """Drop the oldest finished jobs beyond MAX_FINISHED_JOBS.
+
+        Their output directories are kept unless DELETE_EXPIRED_JOB_OUTPUT is set.
+        """
+        with jobs_lock:
+            finished = [
+                job_id for job_id, job in jobs.items() if job["future"].done()
+            ]
+            expired = finished[: max(0, len(finished) - MAX_FINISHED_JOBS)]
+            for job_id in expired:
+                del jobs[job_id]
+
+        if app.config["DELETE_EXPIRED_JOB_OUTPUT"]:
+            for job_id in expired:
+                shutil.rmtree(job_output_dir(job_id), ignore_errors=True)
 
     # Route definitions
     @app.route("/", methods=["GET", "POST"])
     def index():
         """Main page route handler."""
-        endpoints = None
         url_input = request.form.get("url", "")
         request_type = request.form.get("request_type", "GET")
         cookies = request.form.get("cookies", "")
@@ -33,49 +101,57 @@ def create_app():
         if request.method == "POST":
             if not url_input:
                 flash("Please provide a URL to analyze.")
-                return render_template(
-                    "index.html",
-                    endpoints=endpoints,
-                    url_input=url_input,
-                    request_type=request_type,
-                    cookies=cookies,
-                )
+            else:
+                forget_old_jobs()
 
-            try:
-                # Import here to avoid circular imports
-                from api_engine.pipeline import ApiDetectionPipeline
-
-                # Create and run the API detection pipeline
-                pipeline = ApiDetectionPipeline(
-                    output_dir=app.config["OUTPUT_DIR"],
-                    openai_api_key=app.config["OPENAI_API_KEY"],
-                    openai_model=app.config["OPENAI_MODEL"],
+                job_id = uuid.uuid4().hex
+                future = executor.submit(
+                    run_pipeline, job_id, url_input, request_type, cookies
                 )
+                with jobs_lock:
+                    jobs[job_id] = {
+                        "future": future,
+                        "url_input": url_input,
+                        "request_type": request_type,
+                        "cookies": cookies,
+                    }
+                return redirect(url_for("result", job_id=job_id))
 
-                success, api_results, _ = pipeline.run(
-                    url=url_input, request_type=request_type, cookies=cookies
-                )
+        return render_template(
+            "index.html",
+            endpoints=None,
+            url_input=url_input,
+            request_type=request_type,
+            cookies=cookies,
+        )
 
-                if success and api_results:
-                    # Use the API results directly instead of loading from file
-                    # Sort by usefulness score (highest first)
-                    endpoints = sorted(
-                        api_results.endpoints,
-                        key=lambda x: x.usefulness_score,
-                        reverse=True
-                    )
-                else:
-                    flash("Pipeline execution failed. Check logs for details.")
+    @app.route("/result/<job_id>")
+    def result(job_id):
+        """Result page route handler, polled until the pipeline finishes."""
+        with jobs_lock:
+            job = jobs.get(job_id)
+        if job is None:
+            flash("Unknown or expired job. Please run the pipeline again.")
+            return redirect(url_for("index"))
 
+        endpoints = None
+        future = job["future"]
+
+        if future.done():
+            try:
+                endpoints = future.result()
+                if endpoints is None:
+                    flash("Pipeline execution failed. Check logs for details.")
             except Exception as e:
                 flash(f"An error occurred: {str(e)}")
 
         return render_template(
-            "index.html",  # Fixed template name
+            "index.html",
             endpoints=endpoints,
-            url_input=url_input,
-            request_type=request_type,
-            cookies=cookies,
+            pending=not future.done(),
+            url_input=job["url_input"],
+            request_type=job["request_type"],
+            cookies=job["cookies"],
         )
 
     return app
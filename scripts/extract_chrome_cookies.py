@@ -27,42 +27,51 @@ def get_chrome_cookie_db_path():
         raise OSError(f"Unsupported platform: {sys.platform}")
 
 
-def decrypt_cookie_macos(encrypted_value):
-    """Decrypt Chrome cookie on macOS using keychain."""
+def get_macos_cipher():
+    """Build the AES cipher for Chrome cookies from the macOS keychain key.
+
+    This hits the keychain and runs PBKDF2, so call it once per run.
+
+    Returns:
+        tuple: (cipher, pkcs7) to pass to _decrypt, or None if no key was found
+    """
     try:
         import keyring
-        from Crypto.Cipher import AES
-        from Crypto.Protocol.KDF import PBKDF2
+        from cryptography.hazmat.primitives import hashes, padding
+        from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+        from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
     except ImportError:
         print("Error: Required libraries not installed.")
-        print("Install with: pip install keyring pycryptodome")
+        print("Install with: pip install keyring cryptography")
         sys.exit(1)
 
     # Chrome uses 'Chrome Safe Storage' as the keychain entry
+    password = keyring.get_password("Chrome Safe Storage", "Chrome")
+    if not password:
+        print("Error: Could not retrieve Chrome encryption key from keychain")
+        return None
+
+    # Generate the key using PBKDF2
+    kdf = PBKDF2HMAC(
+        algorithm=hashes.SHA1(), length=16, salt=b"saltysalt", iterations=1003
+    )
+    key = kdf.derive(password.encode())
+
+    # Chrome uses AES-128 CBC with an IV of 16 space characters
+    cipher = Cipher(algorithms.AES(key), modes.CBC(b' ' * 16))
+    return cipher, padding.PKCS7(128)
+
+
+def _decrypt(cipher, pkcs7, encrypted_value):
+    """Decrypt a Chrome cookie value with the cipher from get_macos_cipher."""
     try:
-        password = keyring.get_password("Chrome Safe Storage", "Chrome")
-        if not password:
-            print("Error: Could not retrieve Chrome encryption key from keychain")
-            return None
-
-        # Generate the key using PBKDF2
-        salt = b"saltysalt"
-        iterations = 1003
-        key = PBKDF2(password.encode(), salt, dkLen=16, count=iterations)
-
-        # Chrome uses AES-128 CBC
-        # The encrypted value format: 'v10' + IV (16 bytes) + encrypted_data
+        # The encrypted value format: 'v10' + encrypted_data
         if encrypted_value[:3] == b'v10':
-            # Remove 'v10' prefix
-            encrypted_value = encrypted_value[3:]
-            # IV is the first 16 bytes (space characters)
-            iv = b' ' * 16
-            # Decrypt
-            cipher = AES.new(key, AES.MODE_CBC, IV=iv)
-            decrypted = cipher.decrypt(encrypted_value)
+            decryptor = cipher.decryptor()
+            decrypted = decryptor.update(encrypted_value[3:]) + decryptor.finalize()
             # Remove PKCS7 padding
-            padding_length = decrypted[-1]
-            return decrypted[:-padding_length].decode('utf-8')
+            unpadder = pkcs7.unpadder()
+            return (unpadder.update(decrypted) + unpadder.finalize()).decode('utf-8')
 
         return None
     except Exception as e:
@@ -70,48 +79,50 @@ def decrypt_cookie_macos(encrypted_value):
         return None
 
 
-def extract_cookies(domain=None, output_format="string"):
+def _connect_read_only(db_path):
+    """Open a SQLite database read-only without taking any locks."""
+    # immutable=1 lets SQLite skip locking and journaling
+    db_uri = f"{Path(db_path).as_uri()}?mode=ro&immutable=1"
+    conn = sqlite3.connect(db_uri, uri=True)
+    conn.execute("PRAGMA query_only=ON")
+    conn.execute("PRAGMA mmap_size=268435456")
+    return conn
+
+
+def _query_cookies(conn, domain=None):
+    """Run the cookie query and return the cursor over its rows."""
+    cursor = conn.cursor()
+    if domain:
+        query = "SELECT host_key, name, encrypted_value FROM cookies WHERE host_key LIKE ?"
+        cursor.execute(query, (f"%{domain}%",))
+    else:
+        query = "SELECT host_key, name, encrypted_value FROM cookies"
+        cursor.execute(query)
+    return cursor
+
+
+def _read_cookies(db_path, domain=None, cipher=None):
     """
-    Extract cookies from Chrome database.
+    Read and decrypt cookies from a Chrome cookies database.
 
     Args:
-        domain: Optional domain to filter cookies (e.g., 'tettra.co')
-        output_format: 'string' for cookie string, 'json' for JSON format
+        db_path: Path to the cookies database
+        domain: Optional domain to filter cookies
+        cipher: Optional (cipher, pkcs7) tuple from get_macos_cipher
 
     Returns:
-        str: Cookie string or JSON based on format
+        tuple: (list_of_cookie_dicts, list_of_cookie_string_parts)
     """
-    cookie_db = get_chrome_cookie_db_path()
-
-    if not cookie_db.exists():
-        print(f"Error: Chrome cookies database not found at {cookie_db}")
-        sys.exit(1)
-
-    # Copy the database to a temp location (Chrome locks the original)
-    temp_db = tempfile.NamedTemporaryFile(delete=False, suffix=".db")
-    temp_db.close()
-    shutil.copy2(cookie_db, temp_db.name)
+    conn = _connect_read_only(db_path)
 
     try:
-        # Connect to the database
-        conn = sqlite3.connect(temp_db.name)
-        cursor = conn.cursor()
-
-        # Query cookies
-        if domain:
-            query = "SELECT host_key, name, encrypted_value FROM cookies WHERE host_key LIKE ?"
-            cursor.execute(query, (f"%{domain}%",))
-        else:
-            query = "SELECT host_key, name, encrypted_value FROM cookies"
-            cursor.execute(query)
-
         cookies = []
         cookie_string_parts = []
 
-        for host_key, name, encrypted_value in cursor.fetchall():
+        for host_key, name, encrypted_value in _query_cookies(conn, domain):
             # Decrypt the cookie value
             if sys.platform == "darwin":
-                value = decrypt_cookie_macos(encrypted_value)
+                value = _decrypt(*cipher, encrypted_value) if cipher else None
             else:
                 print("Note: Automatic decryption only supported on macOS currently")
                 value = "[encrypted]"
@@ -124,8 +135,48 @@ def extract_cookies(domain=None, output_format="string"):
                 })
                 cookie_string_parts.append(f"{name}={value}")
 
+        return cookies, cookie_string_parts
+
+    finally:
         conn.close()
 
+
+def extract_cookies(domain=None, output_format="string"):
+    """
+    Extract cookies from Chrome database.
+
+    Args:
+        domain: Optional domain to filter cookies (e.g., 'tettra.co')
+        output_format: 'string' for cookie string, 'json' for JSON format
+
+    Returns:
+        str: Cookie string or JSON based on format
+    """
+    cookie_db = get_chrome_cookie_db_path()
+
+    if not cookie_db.exists():
+        print(f"Error: Chrome cookies database not found at {cookie_db}")
+        sys.exit(1)
+
+    # The key is the same for every cookie, so build the cipher once
+    cipher = get_macos_cipher() if sys.platform == "darwin" else None
+
+    temp_db_path = None
+
+    try:
+        try:
+            # Read the live database in place; immutable=1 needs no lock
+            cookies, cookie_string_parts = _read_cookies(cookie_db, domain, cipher)
+        except sqlite3.DatabaseError as e:
+            # Chrome may be writing the file; fall back to reading a copy
+            print(f"Note: Could not read cookies database in place ({e}), copying it")
+            temp_db = tempfile.NamedTemporaryFile(delete=False, suffix=".db")
+            temp_db.close()
+            temp_db_path = temp_db.name
+            shutil.copy2(cookie_db, temp_db_path)
+
+            cookies, cookie_string_parts = _read_cookies(temp_db_path, domain, cipher)
+
         if output_format == "json":
             import json
             return json.dumps(cookies, indent=2)
@@ -134,7 +185,8 @@ def extract_cookies(domain=None, output_format="string"):
 
     finally:
         # Clean up temp file
-        os.unlink(temp_db.name)
+        if temp_db_path:
+            os.unlink(temp_db_path)
 
 
 def main():